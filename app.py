@@ -1,20 +1,58 @@
 import os
 import csv
-import json
 import time
-from typing import List, Dict, Any
+import re
+import asyncio
+import hashlib
+import functools
+import io
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple, Callable, Optional
 
+import orjson
+import numpy as np
 import streamlit as st
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pcsv
 
-# --- Optional: new OpenAI SDK (>=1.0) ---
+# --- Optional: new OpenAI SDK (>=1.0), plus the httpx it is built on ---
 try:
-    from openai import OpenAI  # type: ignore
+    import httpx  # type: ignore
+    from openai import OpenAI, AsyncOpenAI  # type: ignore
     HAS_OAI = True
 except Exception:
     HAS_OAI = False
 
+# --- Optional: tiktoken for exact token counts when trimming long chats ---
+try:
+    import tiktoken  # type: ignore
+    HAS_TIKTOKEN = True
+except Exception:
+    HAS_TIKTOKEN = False
+
 APP_NAME = "AI Chat Organizer — MVP"
+# Rows per page in the Export History table
+HISTORY_PAGE_SIZE = 200
+# Export columns (the keys to_row produces), all plain text
+HISTORY_SCHEMA = pa.schema([(name, pa.string()) for name in [
+    "date", "title", "summary", "tags", "bullets", "action_items", "chat_snippet",
+]])
+MODEL = "gpt-4o-mini"
+# Min seconds between redraws of a streaming response
+STREAM_RENDER_INTERVAL = 0.1
+# Max in-flight requests during batch processing (keeps us under rate limits)
+BATCH_CONCURRENCY = 20
+# Max processed results kept in the shared response cache
+RESPONSE_CACHE_SIZE = 2048
+# Semantic cache: reuse a result when a new chat's embedding is this similar (cosine)
+EMBED_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_THRESHOLD = 0.95
+EMBED_MAX_CHARS = 20000  # keep embedding input well under the model's token limit
+# Longer chats keep their first and last halves of this many tokens
+MAX_CHAT_TOKENS = 12000
+TRUNCATION_MARKER = "\n...[truncated]...\n"
 DEFAULT_SYSTEM = """You are an expert organizer for AI chat transcripts.
 Return clean, concise outputs in JSON with the following schema:
 {
@@ -25,7 +63,82 @@ Return clean, concise outputs in JSON with the following schema:
   "action_items": ["optional, concrete next steps"]
 }
 The title must be short and searchable. The summary must be faithful to the chat content.
-Force tags to be 1-3 words each in kebab-case."""
+Force tags to be 1-3 words each in kebab-case.
+
+# Output rules
+- Respond with exactly one JSON object and nothing else: no markdown fences, no prose before or after it.
+- Use exactly the five keys shown above, spelled exactly as shown. Do not add extra keys.
+- Every key must be present. When there is nothing to report for "action_items", return an empty list [].
+- All values are plain strings or lists of plain strings. Never nest objects or lists inside the lists.
+- Use standard JSON: double-quoted strings, no trailing commas, no comments, and escape any quotes or line breaks inside strings.
+- Do not invent facts, names, numbers, links, or decisions that are not in the transcript.
+
+# How the output is used
+Your JSON is parsed by a program, checked for the required keys, and turned into one row of a CSV file.
+The CSV columns are, in order: date, title, summary, tags, bullets, action_items, chat_snippet.
+The program fills in "date" and "chat_snippet" itself; do not include them in your JSON.
+People later import the CSV into Google Sheets or Notion to sort, filter, and search their past chats.
+A response that is not valid JSON, or that is missing a required key, is recorded as an error instead of a row.
+
+# Key reference
+Each key becomes one column of a spreadsheet row, so every value must read well on its own.
+
+## title (string, required)
+- A short, searchable title for the chat, with no surrounding quotes.
+- Lead with the concrete subject (the tool, topic, or problem), not with filler such as "Discussion about" or "Chat on".
+- Prefer words a person would type into a search box later.
+- Stored as-is in the "title" column.
+
+## summary (string, required)
+- 3 to 5 complete sentences.
+- Cover what the chat set out to do, the key reasoning or decisions along the way, and where it ended up.
+- Keep it faithful. If the chat ended without an answer, say so rather than implying a resolution.
+- Stored as-is in the "summary" column.
+
+## tags (list of strings, required)
+- At most 8 tags.
+- Each tag is 1 to 3 words in kebab-case: lowercase words joined with hyphens, such as "prompt-engineering", "csv-export", "python".
+- No spaces, no underscores, no leading "#", and no punctuation other than hyphens.
+- Do not repeat the same idea in singular and plural forms.
+- Joined with ", " into the "tags" column, so a tag must never contain a comma.
+
+## bullets (list of strings, required)
+- 5 to 8 key points from the chat, one point per list entry.
+- Capture the key facts, steps, decisions, and caveats from the chat.
+- Keep exact names of tools, libraries, functions, files, commands, and settings as they appear in the transcript.
+- Do not start bullets with "-", "*", numbers, or emoji; the list structure already separates them.
+- Joined with " • " into the "bullets" column.
+
+## action_items (list of strings, optional content)
+- Concrete next steps that follow from the chat.
+- The key is always present; use an empty list [] when the chat suggests no next steps.
+- Joined with " | " into the "action_items" column, so an item must never contain " | ".
+
+# Edge cases
+- Several topics: organize around the dominant one.
+- Very short or unclear transcript: still return every key and follow the same counts (3-5 summary sentences, 5-8 bullets), using only what the chat actually contains.
+- Lists must contain strings only; do not return null, numbers, or objects in place of a string.
+
+# Example
+For a chat where a user asks how to deploy a Streamlit app and gets step-by-step help, a good response is:
+{
+  "title": "Deploy Streamlit App to Community Cloud",
+  "summary": "The user asked how to publish a local Streamlit app online. The assistant walked through pushing the code to GitHub, adding a requirements.txt, and connecting the repository in Streamlit Community Cloud. It also explained storing the OpenAI key in Streamlit Secrets instead of the code. The user planned to deploy that evening and test the shared link.",
+  "tags": ["streamlit", "deployment", "streamlit-cloud", "secrets-management", "how-to"],
+  "bullets": [
+    "Push the app folder, including app.py and requirements.txt, to a GitHub repository",
+    "Pin package versions in requirements.txt so the cloud build matches local",
+    "Create the app in Streamlit Community Cloud and point it at app.py on the main branch",
+    "Store OPENAI_API_KEY in Streamlit Secrets and read it with st.secrets",
+    "Redeploy from the dashboard after changing secrets or dependencies"
+  ],
+  "action_items": [
+    "Push the project to a new GitHub repository",
+    "Add OPENAI_API_KEY to the app's Streamlit Secrets",
+    "Open the deployed link and process a sample chat"
+  ]
+}
+The example only illustrates format and tone; base every real answer on the transcript you are given."""
 
 DEFAULT_USER_INSTRUCTION = """Given the following chat transcript, return a single JSON object that follows the schema exactly.
 If the chat covers multiple topics, pick the dominant one.
@@ -35,7 +148,7 @@ Transcript:
 ---
 Now produce ONLY the JSON, no commentary."""
 
-def ensure_openai_client(manual_key: str = ""):
+def _resolve_api_key(manual_key: str = "") -> str:
     if not HAS_OAI:
         raise RuntimeError("OpenAI SDK is not installed in this environment. Add 'openai>=1.0.0' to requirements and redeploy.")
 
@@ -45,14 +158,46 @@ def ensure_openai_client(manual_key: str = ""):
 
     if not key_to_use:
         raise ValueError("Missing OpenAI API key. Please add it to Streamlit Secrets or paste it in Step 0.")
+    return key_to_use
 
-    os.environ["OPENAI_API_KEY"] = key_to_use
-    return OpenAI()
+@st.cache_resource(show_spinner=False)
+def _get_client(api_key: str):
+    # One client per key, reused across reruns so its connection pool keeps
+    # TLS sessions alive instead of handshaking on every click.
+    os.environ["OPENAI_API_KEY"] = api_key
+    return OpenAI(
+        api_key=api_key,
+        http_client=httpx.Client(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=30.0,
+        ),
+    )
 
-def call_openai(client, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
-    # Use Chat Completions for broad compatibility
-    resp = client.chat.completions.create(
-        model="gpt-4o-mini",
+def ensure_openai_client(manual_key: str = ""):
+    return _get_client(_resolve_api_key(manual_key))
+
+def ensure_async_openai_client(manual_key: str = ""):
+    # Async client for concurrent batch processing. Created per batch run,
+    # since its connection pool is bound to the event loop that uses it.
+    # HTTP/2 multiplexes concurrent requests over a few TLS connections.
+    key_to_use = _resolve_api_key(manual_key)
+    transport = httpx.AsyncHTTPTransport(
+        retries=2,
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    )
+    return AsyncOpenAI(
+        api_key=key_to_use,
+        http_client=httpx.AsyncClient(transport=transport, timeout=30.0),
+    )
+
+def _completion_kwargs(system_prompt: str, user_prompt: str) -> Dict[str, Any]:
+    # The system message always goes first and DEFAULT_SYSTEM is padded past
+    # 1024 tokens so OpenAI's automatic prefix caching applies to it. Any edit
+    # to DEFAULT_SYSTEM (even whitespace) invalidates that cache, and the
+    # response cache, until it warms up again.
+    return dict(
+        model=MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
@@ -61,51 +206,394 @@ def call_openai(client, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
         max_tokens=600,
         response_format={"type": "json_object"},
     )
-    text = resp.choices[0].message.content
-    return json.loads(text)
 
-def process_chat(chat_text: str, client) -> Dict[str, Any]:
-    system_prompt = DEFAULT_SYSTEM
-    user_prompt = DEFAULT_USER_INSTRUCTION.format(chat=chat_text.strip())
+def _check_finish(finish_reason: Optional[str]) -> None:
+    # A reply cut off at max_tokens is incomplete JSON; say so instead of a decode error
+    if finish_reason == "length":
+        raise ValueError("Response truncated: the model hit the max_tokens limit before finishing the JSON.")
+
+def call_openai(client, system_prompt: str, user_prompt: str, on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    # Use Chat Completions for broad compatibility
+    kwargs = _completion_kwargs(system_prompt, user_prompt)
+    if on_text is None:
+        resp = client.chat.completions.create(**kwargs)
+        _check_finish(resp.choices[0].finish_reason)
+        text = resp.choices[0].message.content
+    else:
+        # Stream so the first tokens show up right away; on_text gets the text so far.
+        # Each on_text render is a websocket frame, so call it at most every
+        # STREAM_RENDER_INTERVAL seconds, plus once at the end.
+        text = ""
+        finish_reason = None
+        last_render = 0.0
+        for chunk in client.chat.completions.create(stream=True, **kwargs):
+            if not chunk.choices:
+                continue
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            if chunk.choices[0].delta.content:
+                text += chunk.choices[0].delta.content
+                now = time.monotonic()
+                if now - last_render >= STREAM_RENDER_INTERVAL:
+                    on_text(text)
+                    last_render = now
+        on_text(text)
+        _check_finish(finish_reason)
+    return orjson.loads(text)
+
+async def fetch_completion_async(client, system_prompt: str, user_prompt: str) -> str:
+    # Returns the raw JSON text; parsing happens off the event loop (see process_chat_async)
+    resp = await client.chat.completions.create(**_completion_kwargs(system_prompt, user_prompt))
+    _check_finish(resp.choices[0].finish_reason)
+    return resp.choices[0].message.content
+
+def validate_result(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Basic validation
+    for key in ["title", "summary", "tags", "bullets"]:
+        if key not in data:
+            raise ValueError(f"Missing key in JSON: {key}")
+    # Ensure text fields are strings; the model occasionally returns numbers or objects
+    for key in ["title", "summary"]:
+        if not isinstance(data[key], str):
+            data[key] = "" if data[key] is None else str(data[key])
+    # Ensure lists are lists of strings (without copying ones that already are)
+    for key in ["tags", "bullets", "action_items"]:
+        value = data.get(key) or []
+        value = value if isinstance(value, list) else list(value)
+        if not all(isinstance(item, str) for item in value):
+            value = [str(item) for item in value if item is not None]
+        data[key] = value
+    return data
+
+def parse_result(text: str) -> Dict[str, Any]:
+    return validate_result(orjson.loads(text))
+
+@functools.lru_cache(maxsize=1)
+def _encoder():
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        return tiktoken.encoding_for_model(MODEL)
+    except Exception:
+        return None  # older tiktoken without this model, or encoding file not downloadable
+
+def trim_chat(chat_text: str) -> str:
+    # Every token is at least one UTF-8 byte, so chats this small skip tokenizing entirely
+    # (characters are not enough: one emoji or rare CJK character can be several tokens)
+    raw = chat_text.encode("utf-8")
+    if len(raw) <= MAX_CHAT_TOKENS:
+        return chat_text
+    half = MAX_CHAT_TOKENS // 2
+    enc = _encoder()
+    if enc is None:
+        # Fall back to ~3 bytes per token: under the ceiling for English (~4 bytes/token)
+        # and for CJK text (~1 token per 3-byte character)
+        if len(raw) <= MAX_CHAT_TOKENS * 3:
+            return chat_text
+        head = raw[:half * 3].decode("utf-8", errors="ignore")
+        tail = raw[-half * 3:].decode("utf-8", errors="ignore")
+        return head + TRUNCATION_MARKER + tail
+    toks = enc.encode(chat_text, disallowed_special=())
+    if len(toks) <= MAX_CHAT_TOKENS:
+        return chat_text
+    return enc.decode(toks[:half]) + TRUNCATION_MARKER + enc.decode(toks[-half:])
+
+def build_prompts(chat_text: str) -> Tuple[str, str]:
+    return DEFAULT_SYSTEM, DEFAULT_USER_INSTRUCTION.format(chat=trim_chat(chat_text.strip()))
+
+def prompt_hash(system_prompt: str, user_prompt: str) -> str:
+    return hashlib.sha256((system_prompt + "\x00" + user_prompt).encode("utf-8")).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def _response_cache() -> Dict[str, bytes]:
+    # Shared by every session and rerun: prompt hash -> validated JSON bytes.
+    # Safe because temperature is low and the output schema is fixed.
+    return {}
+
+def cache_lookup(key: str):
+    text = _response_cache().get(key)
+    return None if text is None else orjson.loads(text)
+
+@st.cache_resource(show_spinner=False)
+def _response_cache_lock() -> threading.Lock:
+    # Cached alongside the dict: a module-level lock would be recreated on every rerun
+    return threading.Lock()
+
+def cache_store(key: str, data: Dict[str, Any]) -> None:
+    cache = _response_cache()
+    value = orjson.dumps(data)
+    # Every session thread writes to the same dict; evict and insert under one lock
+    with _response_cache_lock():
+        if key not in cache and len(cache) >= RESPONSE_CACHE_SIZE:
+            cache.pop(next(iter(cache), None), None)  # evict the oldest entry
+        cache[key] = value
+
+def _semantic_cache() -> Dict[str, Any]:
+    # Per-session: unit-length embeddings (one row per chat) and their JSON results
+    if "sem_cache" not in st.session_state:
+        st.session_state["sem_cache"] = {"vectors": None, "results": []}
+    return st.session_state["sem_cache"]
+
+def _unit_vector(embedding: List[float]) -> np.ndarray:
+    q = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    return q / norm if norm else q
+
+def embed_chat(client, chat_text: str):
+    # Best effort: a failed embedding just means no semantic cache for this chat
     try:
-        data = call_openai(client, system_prompt, user_prompt)
-        # Basic validation
-        for key in ["title", "summary", "tags", "bullets"]:
-            if key not in data:
-                raise ValueError(f"Missing key in JSON: {key}")
-        # Ensure lists are lists
-        data["tags"] = list(data.get("tags", []))
-        data["bullets"] = list(data.get("bullets", []))
-        data["action_items"] = list(data.get("action_items", []))
-        return data
+        resp = client.embeddings.create(model=EMBED_MODEL, input=chat_text.strip()[:EMBED_MAX_CHARS])
+        return _unit_vector(resp.data[0].embedding)
+    except Exception:
+        return None
+
+async def embed_chat_async(client, chat_text: str):
+    try:
+        resp = await client.embeddings.create(model=EMBED_MODEL, input=chat_text.strip()[:EMBED_MAX_CHARS])
+        return _unit_vector(resp.data[0].embedding)
+    except Exception:
+        return None
+
+def semantic_lookup(q: np.ndarray):
+    cache = _semantic_cache()
+    if cache["vectors"] is None:
+        return None
+    # Vectors are unit length, so the dot product is the cosine similarity
+    sims = cache["vectors"] @ q
+    best = int(np.argmax(sims))
+    if sims[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    return orjson.loads(cache["results"][best])
+
+def semantic_store(q: np.ndarray, data: Dict[str, Any]) -> None:
+    cache = _semantic_cache()
+    cache["vectors"] = q[None, :] if cache["vectors"] is None else np.vstack([cache["vectors"], q])
+    cache["results"].append(orjson.dumps(data))
+
+def process_chat(chat_text: str, client, semantic: bool = False, on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    system_prompt, user_prompt = build_prompts(chat_text)
+    key = prompt_hash(system_prompt, user_prompt)
+    try:
+        cached = cache_lookup(key)
+        if cached is not None:
+            return cached
+        q = embed_chat(client, chat_text) if semantic else None
+        if q is not None:
+            # Not written to the shared exact cache: the hit is another chat's result
+            cached = semantic_lookup(q)
+            if cached is not None:
+                return cached
+        data = validate_result(call_openai(client, system_prompt, user_prompt, on_text))
+    except Exception as e:
+        return {"error": str(e)}
+    # Outside the try: a cache problem must never turn a paid-for result into an error
+    cache_store(key, data)
+    if q is not None:
+        semantic_store(q, data)
+    return data
+
+async def process_chat_async(
+    chat_text: str,
+    client,
+    sem: asyncio.Semaphore,
+    semantic: bool = False,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Dict[str, Any]:
+    system_prompt, user_prompt = build_prompts(chat_text)
+    key = prompt_hash(system_prompt, user_prompt)
+    try:
+        cached = cache_lookup(key)
+        if cached is not None:
+            return cached
+        q = None
+        if semantic:
+            async with sem:
+                q = await embed_chat_async(client, chat_text)
+        if q is not None:
+            # Not written to the shared exact cache: the hit is another chat's result
+            cached = semantic_lookup(q)
+            if cached is not None:
+                return cached
+        async with sem:
+            text = await fetch_completion_async(client, system_prompt, user_prompt)
+        # Parse/validate in a worker thread so the loop keeps receiving other
+        # responses and the progress bar keeps updating meanwhile
+        data = await asyncio.get_running_loop().run_in_executor(executor, parse_result, text)
     except Exception as e:
         return {"error": str(e)}
+    cache_store(key, data)
+    if q is not None:
+        semantic_store(q, data)
+    return data
 
-def to_row(chat_text: str, result: Dict[str, Any]) -> Dict[str, Any]:
+def to_row(chat_text: str, result: Dict[str, Any], today: Optional[str] = None) -> Dict[str, Any]:
+    # Batch callers pass today in so the date is formatted once per batch
+    if today is None:
+        today = time.strftime("%Y-%m-%d")
+    # Slice one char past the limit to detect overflow without len() on the full transcript;
+    # rows then hold only this small copy, never the transcript itself
+    snippet = chat_text[:501]
+    if len(snippet) > 500:
+        snippet = snippet[:500] + "..."
     if "error" in result:
         return {
-            "date": time.strftime("%Y-%m-%d"),
+            "date": today,
             "title": "",
             "summary": result["error"],
             "tags": "",
             "bullets": "",
             "action_items": "",
-            "chat_snippet": chat_text[:500] + ("..." if len(chat_text) > 500 else ""),
+            "chat_snippet": snippet,
         }
+    get = result.get
     return {
-        "date": time.strftime("%Y-%m-%d"),
-        "title": result.get("title", ""),
-        "summary": result.get("summary", ""),
-        "tags": ", ".join(result.get("tags", [])),
-        "bullets": " • ".join(result.get("bullets", [])),
-        "action_items": " | ".join(result.get("action_items", [])),
-        "chat_snippet": chat_text[:500] + ("..." if len(chat_text) > 500 else ""),
+        "date": today,
+        "title": get("title", ""),
+        "summary": get("summary", ""),
+        "tags": ", ".join(get("tags") or ()),
+        "bullets": " • ".join(get("bullets") or ()),
+        "action_items": " | ".join(get("action_items") or ()),
+        "chat_snippet": snippet,
     }
 
-def split_by_delimiter(text: str, delimiter: str = "\n-----\n") -> List[str]:
-    parts = [p.strip() for p in text.split(delimiter)]
+# A line of five or more dashes, allowing stray spaces and Windows line endings
+_DELIM_RE = re.compile(r"\r?\n[ \t]*-{5,}[ \t]*\r?\n")
+
+def split_by_delimiter(text: str) -> List[str]:
+    parts = [p.strip() for p in _DELIM_RE.split(text)]
     return [p for p in parts if p]
 
+def part_hash(chat_text: str) -> str:
+    return hashlib.sha1(chat_text.encode("utf-8")).hexdigest()
+
+def checkpoint_path(batch_text: str) -> str:
+    # Named after the pasted text (not the session), so a reconnected
+    # browser pasting the same batch finds the same checkpoint file
+    return f".checkpoint_{part_hash(batch_text)[:16]}.jsonl"
+
+def load_checkpoint(path: str) -> Dict[str, Dict[str, Any]]:
+    # part hash -> row, for every part that finished without an error
+    done: Dict[str, Dict[str, Any]] = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as fp:
+        for line in fp:
+            try:
+                entry = orjson.loads(line)
+            except ValueError:
+                continue  # partial last line from an interrupted write
+            if entry.get("ok"):
+                done[entry["part_hash"]] = entry["row"]
+    return done
+
+async def process_batch_async(
+    parts: List[str],
+    client,
+    progress,
+    semantic: bool = False,
+    checkpoint: Optional[str] = None,
+    resume: bool = False,
+) -> List[Dict[str, Any]]:
+    # Fire all requests concurrently (bounded by the semaphore); rows keep the pasted order
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    done = load_checkpoint(checkpoint) if checkpoint and resume else {}
+    hashes = [part_hash(p) for p in parts]
+    today = time.strftime("%Y-%m-%d")
+
+    executor = ThreadPoolExecutor(max_workers=8)
+
+    async def _one(h: str, p: str):
+        return h, await process_chat_async(p, client, sem, semantic, executor)
+
+    rows: List[Dict[str, Any]] = [done.get(h, {}) for h in hashes]
+    # Identical chats are sent once; the result fans back out to every copy
+    pending: Dict[str, List[int]] = {}
+    for i, h in enumerate(hashes):
+        if h not in done:
+            pending.setdefault(h, []).append(i)
+    tasks = [asyncio.create_task(_one(h, parts[idxs[0]])) for h, idxs in pending.items()]
+    finished = len(parts) - sum(len(idxs) for idxs in pending.values())
+    # Always append: an unticked "resume" must not wipe an interrupted run's progress.
+    # The file is only removed once the whole batch has been added to history.
+    fp = open(checkpoint, "ab") if checkpoint else None
+    # Each progress update is a websocket frame; cap them at ~100 per batch
+    step = max(1, len(parts) // 100)
+    shown = finished
+    try:
+        progress.progress(finished / max(1, len(parts)))
+        for fut in asyncio.as_completed(tasks):
+            h, result = await fut
+            for i in pending[h]:
+                rows[i] = to_row(parts[i], result, today)
+                if fp is not None:
+                    fp.write(orjson.dumps({"idx": i, "part_hash": h, "ok": "error" not in result, "row": rows[i]}) + b"\n")
+            if fp is not None:
+                fp.flush()
+            finished += len(pending[h])
+            if finished - shown >= step or finished == len(parts):
+                progress.progress(finished / len(parts))
+                shown = finished
+    finally:
+        if fp is not None:
+            fp.close()
+        executor.shutdown(wait=False)
+        await client.close()
+    return rows
+
+def submit_batch_job(client, parts: List[str]) -> str:
+    # OpenAI Batch API: ~50% cheaper than live calls, results within 24h
+    lines = []
+    for i, p in enumerate(parts):
+        system_prompt, user_prompt = build_prompts(p)
+        lines.append(orjson.dumps({
+            "custom_id": f"chat-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _completion_kwargs(system_prompt, user_prompt),
+        }))
+    payload = b"\n".join(lines) + b"\n"
+    batch_file = client.files.create(file=("batch_input.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
+
+def collect_batch_results(client, output_file_id: str, parts: List[str]) -> List[Dict[str, Any]]:
+    results: Dict[int, Dict[str, Any]] = {}
+    content = client.files.content(output_file_id).text
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        i = int(item["custom_id"].split("-", 1)[1])
+        try:
+            if item.get("error"):
+                raise ValueError(item["error"].get("message", "Batch request failed"))
+            body = item["response"]["body"]
+            _check_finish(body["choices"][0].get("finish_reason"))
+            results[i] = parse_result(body["choices"][0]["message"]["content"])
+        except Exception as e:
+            results[i] = {"error": str(e)}
+    # Requests that failed outright only show up in the batch's error file
+    missing = {"error": "No result returned by the batch job."}
+    today = time.strftime("%Y-%m-%d")
+    return [to_row(p, results.get(i, missing), today) for i, p in enumerate(parts)]
+
+def export_history(history: List[Dict[str, Any]]) -> Tuple[pa.Table, bytes]:
+    # Every widget interaction reruns the script; history is append-only,
+    # so only rebuild the table and CSV when rows have been added.
+    cached = st.session_state.get("_df_cache")
+    if cached is None or cached[0] != len(history):
+        # Arrow's C++ CSV writer is much faster than pandas' for long text columns
+        # Explicit schema: column types never depend on what the first rows happen to hold
+        table = pa.Table.from_pylist(history, schema=HISTORY_SCHEMA)
+        buf = io.BytesIO()
+        pcsv.write_csv(table, buf)
+        cached = (len(history), table, buf.getvalue())
+        st.session_state["_df_cache"] = cached
+    return cached[1], cached[2]
+
 def main():
     st.set_page_config(page_title=APP_NAME, page_icon="🗂️", layout="wide")
     st.title("🗂️ AI Chat Organizer — MVP")
@@ -128,6 +616,12 @@ def main():
         # store manual key (may be empty). ensure_openai_client() will fall back to secrets.
         st.session_state["api_key"] = api_key
 
+        semantic = st.checkbox(
+            "Reuse results for near-duplicate chats",
+            value=False,
+            help="Embeds each chat and reuses an earlier result when it is at least 95% similar. Costs one small embedding call per new chat.",
+        )
+
     tab_single, tab_batch, tab_export = st.tabs(["Single Chat", "Batch Paste", "Export History"])
     if "history" not in st.session_state:
         st.session_state["history"] = []  # list of rows
@@ -136,13 +630,17 @@ def main():
     with tab_single:
         st.subheader("Single Chat")
         chat = st.text_area("Paste one chat transcript here", height=250, placeholder="Paste your conversation...")
+        stream = st.checkbox("Stream output", value=False, help="Show the response as it is being written.")
         if st.button("Process This Chat", type="primary"):
             if not chat.strip():
                 st.warning("Please paste a chat first.")
             else:
                 try:
                     client = ensure_openai_client(st.session_state.get("api_key", ""))
-                    result = process_chat(chat, client)
+                    placeholder = st.empty()
+                    on_text = (lambda text: placeholder.code(text, language="json")) if stream else None
+                    result = process_chat(chat, client, semantic, on_text)
+                    placeholder.empty()
                     row = to_row(chat, result)
                     st.session_state["history"].append(row)
 
@@ -157,9 +655,16 @@ def main():
     # BATCH
     with tab_batch:
         st.subheader("Batch: Multiple Chats")
-        st.write("Paste multiple chats separated by a line with exactly five dashes:")
+        st.write("Paste multiple chats separated by a line of five (or more) dashes:")
         st.code("-----", language="text")
         batch_text = st.text_area("Paste many chats", height=250, placeholder="Chat A...\n-----\nChat B...\n-----\nChat C...")
+        resume = st.checkbox(
+            "Resume previous batch",
+            value=False,
+            help="Skip chats that already finished in an interrupted run of this same pasted batch.",
+        )
+        if batch_text.strip() and not resume and os.path.exists(checkpoint_path(batch_text)):
+            st.info("An interrupted run of this batch was found. Tick **Resume previous batch** to skip the chats it already finished.")
         if st.button("Process All Chats in Batch"):
             if not batch_text.strip():
                 st.warning("Please paste something.")
@@ -167,28 +672,76 @@ def main():
                 parts = split_by_delimiter(batch_text)
                 st.info(f"Found {len(parts)} chats.")
                 try:
-                    client = ensure_openai_client(api_key)
+                    client = ensure_async_openai_client(api_key)
                     progress = st.progress(0.0)
-                    rows = []
-                    for i, p in enumerate(parts, start=1):
-                        result = process_chat(p, client)
-                        row = to_row(p, result)
-                        rows.append(row)
-                        progress.progress(i / max(1, len(parts)))
+                    checkpoint = checkpoint_path(batch_text)
+                    rows = asyncio.run(process_batch_async(parts, client, progress, semantic, checkpoint, resume))
                     st.session_state["history"].extend(rows)
+                    # Another tab running the same pasted batch may have removed it already
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(checkpoint)
                     st.success("Batch processing complete. See Export tab.")
                 except Exception as e:
                     st.error(str(e))
 
+        st.caption("Not in a hurry? Submit a Batch Job instead: about half the cost, results within 24 hours.")
+        if st.button("Submit as Batch Job"):
+            if not batch_text.strip():
+                st.warning("Please paste something.")
+            else:
+                parts = split_by_delimiter(batch_text)
+                try:
+                    client = ensure_openai_client(api_key)
+                    batch_id = submit_batch_job(client, parts)
+                    st.session_state["batch_job"] = {"id": batch_id, "parts": parts}
+                    st.success(f"Submitted {len(parts)} chats as batch job {batch_id}.")
+                except Exception as e:
+                    st.error(str(e))
+
+        job = st.session_state.get("batch_job")
+        if job:
+            st.write(f"Pending batch job: `{job['id']}` ({len(job['parts'])} chats)")
+            if st.button("Check Batch Status"):
+                try:
+                    client = ensure_openai_client(api_key)
+                    batch = client.batches.retrieve(job["id"])
+                    counts = batch.request_counts
+                    if counts is not None:
+                        st.info(f"Status: {batch.status} — {counts.completed}/{counts.total} done, {counts.failed} failed.")
+                    else:
+                        st.info(f"Status: {batch.status}")
+                    if batch.status in ("completed", "expired", "cancelled"):
+                        if batch.output_file_id:
+                            rows = collect_batch_results(client, batch.output_file_id, job["parts"])
+                            st.session_state["history"].extend(rows)
+                            st.success("Batch job results added. See Export tab.")
+                        else:
+                            st.warning("The batch job finished without any results.")
+                        del st.session_state["batch_job"]
+                    elif batch.status == "failed":
+                        st.error("The batch job failed.")
+                        del st.session_state["batch_job"]
+                except Exception as e:
+                    st.error(str(e))
+
         # EXPORT
     with tab_export:
         st.subheader("History & Export")
-        df = pd.DataFrame(st.session_state["history"])
-        if df.empty:
+        history = st.session_state["history"]
+        if not history:
             st.info("No processed chats yet. Process in the other tabs first.")
         else:
-            st.dataframe(df, use_container_width=True, height=400)
-            csv_bytes = df.to_csv(index=False).encode("utf-8")
+            table, csv_bytes = export_history(history)
+            # Only send one page of rows to the browser. Pages count back from the end,
+            # so page 1 is always the newest HISTORY_PAGE_SIZE chats.
+            n = table.num_rows
+            pages = (n + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+            page = 1
+            if pages > 1:
+                page = int(st.number_input(f"Page (1 = newest, {pages} = oldest)", min_value=1, max_value=pages, value=1, step=1))
+            end = n - (page - 1) * HISTORY_PAGE_SIZE
+            start = max(0, end - HISTORY_PAGE_SIZE)
+            st.dataframe(table.slice(start, end - start), use_container_width=True, height=400)
             st.download_button("⬇️ Download CSV", data=csv_bytes, file_name="organized_chats.csv", mime="text/csv")
             st.write("Tip: You can import this CSV into Google Sheets or Notion for further organization.")
 